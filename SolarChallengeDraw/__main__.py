@@ -14,10 +14,6 @@ Written by Jotham Gates, 2025.
 """
 import argparse
 import platform
-import gui
-import knockout
-import car
-from save_load import CarCSVLoader
 
 
 def get_arguments() -> argparse.Namespace:
@@ -72,12 +68,10 @@ def ghostscript_location(provided: str | None) -> str:
 
 if __name__ == "__main__":
     args = get_arguments()
-    # cars = car.load_cars(args.cars)
-    # car_loader = CarCSVLoader(args.cars)
-    # car_loader.load()
-    # cars = car_loader.cars
-    # knockout_event = knockout.KnockoutEvent(cars, "Test event", 10)
-    # knockout_event.print()
+
+    # Imported after argument parsing so that --help (and argument errors)
+    # don't pay for loading Tk and the drawing modules.
+    import gui
+
     gui_ui = gui.Gui(ghostscript_location(args.ghostscript), args.cars, args.json)
-    # gui_ui.knockout.draw_event(knockout_event, cars)
     gui_ui.run()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from enum import StrEnum
+from functools import cached_property
 from typing import Any, Dict
 
 import numpy as np
@@ -18,6 +19,11 @@ class Car:
 
     def __repr__(self) -> str:
         return f"<{self.car_id:>3d}, {self.points:>2.0f}>"
+
+    @cached_property
+    def car_id_str(self) -> str:
+        """The car ID formatted once for display (shown in every number box)."""
+        return str(self.car_id)
     
     class Fields(StrEnum):
         CAR_ID = "Car ID"
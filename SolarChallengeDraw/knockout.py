@@ -5,6 +5,9 @@ Written by Jotham Gates, 21/10/2025"""
 from __future__ import annotations
 from dataclasses import dataclass
 from enum import StrEnum
+from functools import cached_property, lru_cache
+from operator import attrgetter
+import sys
 from typing import Any, Dict, Iterable, List, Sequence, Tuple, cast
 import numpy as np
 
@@ -18,79 +21,75 @@ from knockout_race import (
     BranchType,
     Podium,
     Winnable,
+    notify_state_changed,
 )
 
 
-def add_round(next_round: List[Race]) -> List[Race]:
-    """Adds a normal round where the number of competitors are halved in the winners' bracket.
-    This works backwards and generates the current round given the next round."""
-    races = []
-    competitors_in_round = 4 * len(next_round)
+@lru_cache(maxsize=None)
+def bracket_seed_order(rounds: int) -> np.ndarray:
+    """Calculates the order of the seeds across the first round of a single
+    elimination draw with optimal seeding.
 
-    def seed_pair(seed: int) -> int:
-        """Returns the pair of a seed.
-        (The worst opponent for the current rank).
-        The sum of the pair should add to the number of competitors in the round + 1."""
-        return competitors_in_round + 1 - seed
+    The result only depends on the number of rounds, so it is memoised and
+    returned as a read-only array for callers that rebuild draws repeatedly
+    (simulations and the like).
 
-    for next_round_race in next_round:
-        # Race that determines the left competitor in the next round.
-        high_seed = next_round_race.theoretical_winner().seed
-        left_race = Race(
-            left_branch=RaceBranch(
-                seed=high_seed, branch_type=BranchType.DEPENDENT_EDITABLE
-            ),
-            right_branch=RaceBranch(
-                seed=seed_pair(high_seed),
-                branch_type=BranchType.DEPENDENT_EDITABLE,
-            ),
-            winner_next_race=next_round_race,
-        )
-        races.append(left_race)
-        next_round_race.left_branch.prev_race = left_race
+    Consecutive pairs in the array are the competitors in each first round
+    race (for 3 rounds this is [1, 8, 4, 5, 2, 7, 3, 6]). Each round doubles
+    the array by interleaving the existing seeds with their pairs (the pair of
+    a seed sums to the number of competitors in the round + 1), so the whole
+    order is generated with one vectorised NumPy operation per round rather
+    than Python loops.
+
+    Args:
+        rounds (int): The number of rounds in the draw.
+
+    Returns:
+        np.ndarray: The seeds in first round order.
+    """
+    order = np.array([1], dtype=np.int32)
+    for _ in range(rounds):
+        order = np.stack((order, 2 * order.size + 1 - order)).T.ravel()
+
+    # Guard the cached array against accidental modification by callers.
+    order.flags.writeable = False
+    return order
+
+
+def create_empty_draw(competitors: int) -> List[List[Race]]:
+    """Creates an empty single elimination draw with optimal seeding."""
+    # ceil(log2(competitors)) in integer arithmetic. Always include the final.
+    rounds = max((competitors - 1).bit_length(), 1)
+    seed_order = bracket_seed_order(rounds)
 
-        # Race that determines the right competitor in the next round.
-        low_seed = next_round_race.theoretical_loser().seed
-        right_race = Race(
+    # Build the first round directly from consecutive pairs of the seed order.
+    first_round = [
+        Race(
             left_branch=RaceBranch(
-                seed=low_seed,
-                branch_type=BranchType.DEPENDENT_EDITABLE,
+                seed=int(seed_order[i]), branch_type=BranchType.DEPENDENT_EDITABLE
             ),
             right_branch=RaceBranch(
-                seed=seed_pair(low_seed),
+                seed=int(seed_order[i + 1]),
                 branch_type=BranchType.DEPENDENT_EDITABLE,
             ),
-            winner_next_race=next_round_race,
         )
-        races.append(right_race)
-        next_round_race.right_branch.prev_race = right_race
-
-    return races
-
-
-def create_empty_draw(competitors: int) -> List[List[Race]]:
-    """Creates an empty single elimination draw with optimal seeding."""
-    rounds = int(np.ceil(np.log2(competitors)))
-    single_elim_final = Race(
-        left_branch=RaceBranch(seed=1, branch_type=BranchType.DEPENDENT_EDITABLE),
-        right_branch=RaceBranch(
-            seed=2,
-            branch_type=BranchType.DEPENDENT_EDITABLE,
-        ),
-    )
+        for i in range(0, len(seed_order), 2)
+    ]
 
-    event: List[List[Race]] = [[single_elim_final]]
-    for event_round in range(rounds - 2, -1, -1):
-        event.append(add_round(event[-1]))
+    # Knock out forwards until a single race (the final) is left.
+    event: List[List[Race]] = [first_round]
+    while len(event[-1]) > 1:
+        event.append(forward_knockout(event[-1]))
 
-    # Flip the order so that the first round is at the start.
-    event = list(reversed(event))
     return event
 
 
 def print_bracket(event: Iterable[List[Race]]) -> None:
+    # Format each round in one pass and write it in a single call rather than
+    # going through repr(list) and print's line buffering.
     for round_num, r in enumerate(event):
-        print(f"{round_num:5}: {r}")
+        body = ", ".join(repr(race) for race in r)
+        sys.stdout.write(f"{round_num:5}: [{body}]\n")
 
 
 def add_first_losers(winning_round1: List[Race]) -> List[Race]:
@@ -210,7 +209,7 @@ def randomise_cars(cars: List[Car]) -> List[Car]:
 def assign_cars(cars: List[Car], first_round: List[Race], reverse: bool = True) -> None:
     """Assigns cars to the first round of the draw."""
     sorted_cars: List[Car | None] = sorted(
-        cars, key=lambda c: cast(Car, c).points, reverse=True
+        cars, key=attrgetter("points"), reverse=True
     )  # Set reverse to True to reward higher rather than lower points.
     byes = 2 * len(first_round) - len(sorted_cars)
     sorted_cars.extend([None] * byes)
@@ -218,13 +217,22 @@ def assign_cars(cars: List[Car], first_round: List[Race], reverse: bool = True)
         first_round
     ), "We should have introduced enough byes to obtain the required number of participents, but something went wrong."
 
+    # Map each seed to its branch in one pass, then walk the sorted cars once.
+    seed_to_branch: Dict[int, RaceBranch] = {}
     for race in first_round:
-        race.left_branch.car = sorted_cars[race.left_branch.seed - 1]
-        race.left_branch.branch_type = BranchType.FIXED
-        race.left_branch.filled = True
-        race.right_branch.car = sorted_cars[race.right_branch.seed - 1]
-        race.right_branch.branch_type = BranchType.FIXED
-        race.right_branch.filled = True
+        seed_to_branch[race.left_branch.seed] = race.left_branch
+        seed_to_branch[race.right_branch.seed] = race.right_branch
+
+    assert len(seed_to_branch) == len(
+        sorted_cars
+    ), "Each car (or bye) should have exactly one first round branch."
+    for seed, car in enumerate(sorted_cars, start=1):
+        branch = seed_to_branch[seed]
+        branch.car = car
+        branch.branch_type = BranchType.FIXED
+        branch.filled = True
+
+    notify_state_changed()
 
 
 def add_grand_final(
@@ -279,6 +287,34 @@ def add_grand_final(
     return grand_final, podiums
 
 
+# Structure of array (SoA) layout of the fixed attributes of a round of races.
+RACE_ARRAY_DTYPE = np.dtype(
+    [("left_seed", "i2"), ("right_seed", "i2"), ("race_number", "i4")]
+)
+
+
+def races_to_array(races: List[Race]) -> np.ndarray:
+    """Snapshots the fixed attributes of a round into a NumPy structured array.
+
+    The seeds and race numbers don't change once an event is numbered, so
+    consumers that analyse many races (renderers, simulators) can traverse
+    this contiguous array instead of chasing pointers through Race objects.
+    The Race objects remain the authoritative source for results and
+    winner propagation.
+
+    Args:
+        races (List[Race]): The round to snapshot.
+
+    Returns:
+        np.ndarray: An array with RACE_ARRAY_DTYPE, one entry per race.
+    """
+    array = np.empty(len(races), dtype=RACE_ARRAY_DTYPE)
+    for i, race in enumerate(races):
+        array[i] = (race.left_branch.seed, race.right_branch.seed, race.race_number)
+
+    return array
+
+
 def number_races_in_round(races: List[Race], start: int) -> int:
     """Adds the race number to each race in a round.
 
@@ -304,7 +340,7 @@ class RoundType(StrEnum):
     GRAND_FINAL = "Grand final"
 
 
-@dataclass
+@dataclass(slots=True)
 class RoundId:
     """Class that identifies a round."""
 
@@ -321,6 +357,17 @@ class RoundId:
         return repr(self)
 
 
+@lru_cache(maxsize=None)
+def round_id(round_type: RoundType, round_index: int | None = None) -> RoundId:
+    """Returns a shared RoundId for the given type and index.
+
+    RoundId objects are never modified once created, so the same instance can
+    be handed out every time (a flyweight). This avoids allocating a fresh
+    batch of identical ids for every event, which matters when many events of
+    the same size are created (e.g. simulations)."""
+    return RoundId(round_type, round_index)
+
+
 class AuxilliaryRaceManager:
     """Class that manages axilliary races."""
 
@@ -412,6 +459,7 @@ class AuxilliaryRaceManager:
 
         # Point forwards from the previous race to the auxilliary race.
         prev_race.loser_next_race = aux_race
+        notify_state_changed()
 
     def _remove(self, prev_race: Race) -> None:
         """Removes the auxilliary race from the previous one.
@@ -449,6 +497,7 @@ class AuxilliaryRaceManager:
 
         # Point forwards from the previous race to the next race.
         prev_race.loser_next_race = next_race
+        notify_state_changed()
 
     def free_race(self, prev_race: Race) -> None:
         print(f"Freeing aux. race {prev_race.loser_next_race} from {prev_race}")
@@ -483,6 +532,15 @@ class KnockoutEvent:
         self.auxilliary_races = auxilliary_races
         self.name = name
 
+        # Precomputed lookup so that get_round is a dictionary access rather
+        # than a match statement on every call.
+        self._rounds_by_type: Dict[RoundType, List[List[Race]]] = {
+            RoundType.WINNERS: self.winners_bracket,
+            RoundType.LOSERS: self.losers_bracket,
+            RoundType.GRAND_FINAL: [[self.grand_final]],
+            RoundType.AUXILLIARY: [self.auxilliary_races.races],
+        }
+
     @classmethod
     def new_from_cars(
         cls, cars: List[Car], name: str, max_auxilliary_races: int
@@ -523,8 +581,9 @@ class KnockoutEvent:
         event.number_races()
         return event
 
-    def calculate_play_order(self) -> List[RoundId]:
-        """Determines the order that the event should be played.
+    @cached_property
+    def play_order(self) -> List[RoundId]:
+        """The order that the event should be played, computed once per event.
         An example ordering for a 32 car draw is:
         P1, SC1, P2, SC2, SC3, P3, SC4, SC5, P4, SC6, SC7, P5, SC8, GF
 
@@ -534,33 +593,108 @@ class KnockoutEvent:
         Returns:
             List[RoundId]: The play order of the event.
         """
+        # The length of the play order is known up front, so preallocate the
+        # list rather than growing it with repeated appends.
+        count = len(self.winners_bracket) + len(self.losers_bracket) + 1
+        play_order: List[RoundId | None] = [None] * count
+
         # Initial winners and losers rounds.
-        play_order: List[RoundId] = [
-            RoundId(RoundType.WINNERS, 0),
-            RoundId(RoundType.LOSERS, 0),
-        ]
+        play_order[0] = round_id(RoundType.WINNERS, 0)
+        play_order[1] = round_id(RoundType.LOSERS, 0)
+        index = 2
 
         # Patterns of 1 winners' round followed by 2 losers' rounds to keep them somewhat in sync.
         for winners_index in range(1, len(self.winners_bracket)):
-            play_order.append(RoundId(RoundType.WINNERS, winners_index))
-            play_order.append(RoundId(RoundType.LOSERS, 2 * winners_index - 1))
+            play_order[index] = round_id(RoundType.WINNERS, winners_index)
+            play_order[index + 1] = round_id(RoundType.LOSERS, 2 * winners_index - 1)
+            index += 2
             if len(self.losers_bracket) > 2 * winners_index:
                 # The last pattern won't have 2 losers rounds back to back.
-                play_order.append(RoundId(RoundType.LOSERS, 2 * winners_index))
+                play_order[index] = round_id(RoundType.LOSERS, 2 * winners_index)
+                index += 1
 
         # Add the grand final and check the process worked correctly.
-        play_order.append(RoundId(RoundType.GRAND_FINAL))
-        assert (
-            len(play_order) == len(self.winners_bracket) + len(self.losers_bracket) + 1
-        ), "Incorrect number of rounds in the play order."
-        return play_order
+        play_order[index] = round_id(RoundType.GRAND_FINAL)
+        assert index + 1 == count, "Incorrect number of rounds in the play order."
+        return cast(List[RoundId], play_order)
+
+    def calculate_play_order(self) -> List[RoundId]:
+        """Returns the play order of the event (see play_order).
+
+        The order only depends on the shape of the brackets, so it is cached
+        on the event and this simply returns the cached list.
+        """
+        return self.play_order
+
+    @cached_property
+    def all_races(self) -> List[Race]:
+        """A flat list of every race in the event in play order, computed once
+        per event. The races themselves are shared with the brackets, so the
+        list stays current as results are entered."""
+        races: List[Race] = []
+        for id in self.play_order:
+            races.extend(self.get_round(id))
+        return races
+
+    def simulate_batch(
+        self,
+        cars: List[Car],
+        win_probability: np.ndarray,
+        trials: int,
+        rng: np.random.Generator | None = None,
+    ) -> np.ndarray:
+        """Runs many simulations of the primary (winners') bracket in one
+        vectorised NumPy pass.
+
+        Instead of calling set_winner race by race for every trial, all
+        trials are carried along an extra array axis so that the Python
+        overhead is paid once per round rather than once per race per trial.
+        Only the primary single elimination bracket is modelled (no DNRs or
+        second chance draw).
+
+        Args:
+            cars (List[Car]): The cars in the event. win_probability is
+                indexed by positions in this list.
+            win_probability (np.ndarray): A square matrix where element
+                [i, j] is the probability that cars[i] beats cars[j].
+            trials (int): The number of independent tournaments to run.
+            rng (np.random.Generator | None, optional): The source of
+                randomness. Defaults to a fresh default generator.
+
+        Returns:
+            np.ndarray: How many trials each car won the bracket in, indexed
+                to match cars.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        # Map the first round into an array of car indices (-1 for a bye).
+        indices = {id(car): i for i, car in enumerate(cars)}
+        slots: List[int] = []
+        for race in self.winners_bracket[0]:
+            for branch in race.get_branches():
+                slots.append(-1 if branch.car is None else indices[id(branch.car)])
+
+        # One row of slots per trial, knocked out round by round.
+        current = np.tile(np.array(slots, dtype=np.int32), (trials, 1))
+        while current.shape[1] > 1:
+            left = current[:, 0::2]
+            right = current[:, 1::2]
+            # Probability that the left entry advances. The clipping keeps
+            # the fancy indexing in bounds for byes - those results are
+            # overwritten by the bye handling below.
+            p_left = win_probability[np.clip(left, 0, None), np.clip(right, 0, None)]
+            p_left = np.where(right < 0, 1.0, np.where(left < 0, 0.0, p_left))
+            current = np.where(rng.random(left.shape) < p_left, left, right)
+
+        winners = current[:, 0]
+        return np.bincount(winners[winners >= 0], minlength=len(cars))
 
     def number_races(self) -> None:
         # Assigns a number to each race, based on the play order.
-        play_order = self.calculate_play_order()
         start_number = 1
-        for round_id in play_order:
-            start_number = number_races_in_round(self.get_round(round_id), start_number)
+        for id in self.play_order:
+            start_number = number_races_in_round(self.get_round(id), start_number)
 
     def get_round(self, id: RoundId) -> List[Race]:
         """Gets the round corresponding to a given RoundId object.
@@ -574,21 +708,15 @@ class KnockoutEvent:
             List[Race]: The corresponding round.
         """
 
-        def check_length(bracket: List[List[Race]]) -> List[Race]:
-            if id.round_index is None or id.round_index >= len(bracket):
-                raise KeyError(f"Round {str(id)} could not be found in this event.")
-            else:
-                return bracket[id.round_index]
-
-        match id.round_type:
-            case RoundType.WINNERS:
-                return check_length(self.winners_bracket)
-            case RoundType.LOSERS:
-                return check_length(self.losers_bracket)
-            case RoundType.GRAND_FINAL:
-                return [self.grand_final]
-            case RoundType.AUXILLIARY:
-                return self.auxilliary_races.races
+        bracket = self._rounds_by_type[id.round_type]
+        if id.round_type in (RoundType.GRAND_FINAL, RoundType.AUXILLIARY):
+            # These are a single round each, so the index is not used.
+            return bracket[0]
+
+        if id.round_index is None or id.round_index >= len(bracket):
+            raise KeyError(f"Round {str(id)} could not be found in this event.")
+        else:
+            return bracket[id.round_index]
 
     def print(self) -> None:
         """Prints the event to the terminal."""
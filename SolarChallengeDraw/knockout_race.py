@@ -4,8 +4,8 @@ Written by Jotham Gates, 29/11/2025"""
 
 from __future__ import annotations
 from abc import ABC, abstractproperty
-from dataclasses import dataclass
-from enum import Enum, IntEnum, StrEnum, auto
+from dataclasses import dataclass, field
+from enum import IntEnum, StrEnum, auto
 from typing import Any, Dict, Iterable, List, Literal, Tuple, cast, TYPE_CHECKING
 import numpy as np
 from car import Car
@@ -17,6 +17,31 @@ if TYPE_CHECKING:
     from knockout import AuxilliaryRaceManager
 
 
+# Generation counter for the race graph. Incremented whenever a result or
+# link changes so that cached derived state (see Race.is_result_decided) is
+# recomputed on next use instead of being re-derived on every query.
+_state_generation: int = 0
+
+
+def notify_state_changed() -> None:
+    """Records that a race result or link in the graph has changed.
+
+    Call this after mutating branch cars / links outside of
+    update_from_prev_race so that any cached derived state is invalidated.
+    """
+    global _state_generation
+    _state_generation += 1
+
+
+def state_generation() -> int:
+    """Returns the current race graph generation.
+
+    Callers outside this module can key their own caches on this value and
+    recompute when it changes (e.g. option lists in the sheet widgets).
+    """
+    return _state_generation
+
+
 class BranchType(StrEnum):
     """Represents the type of the branch and whether the value should be edited."""
 
@@ -35,27 +60,47 @@ class FillProbability(IntEnum):
     UNKOWN = auto()
 
 
-class BranchResult(Enum):
-    """Represents if a branch is the result of a win or a lose from the previous race."""
+class BranchResult(IntEnum):
+    """Represents if a branch is the result of a win or a lose from the previous race.
+
+    An IntEnum so that comparisons are plain integer compares - this is only
+    used internally and never serialised."""
 
     NEITHER = auto()
     WINNER = auto()
     LOSER = auto()
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class RaceBranch:
-    """Class that represents a branch (competitor) of a race."""
+    """Class that represents a branch (competitor) of a race.
+
+    Branches are unique nodes in the race graph, so they compare by identity
+    (eq=False) and use __slots__ to keep the many instances per event small.
+    """
 
     seed: int
     branch_type: BranchType
     prev_race: Race | None = None
     car: Car | None = None
     filled: bool = False
+    # Cached (generation, override flag, result) for is_editable. Kept out of
+    # __init__ / repr as it is purely derived state.
+    _editable_cache: Tuple[int, bool, bool] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Cached (generation, result) for branch_result, same scheme as above.
+    _result_cache: Tuple[int, BranchResult] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def is_editable(self, override_type_editable: bool = False) -> bool:
         """Checks if the race branch is editable.
 
+        The result involves several walks through the surrounding race graph
+        and is queried per branch on every repaint, so it is cached until the
+        graph changes (see notify_state_changed).
+
         Args:
             override_type_editable (bool, optional): If True, treats
                 BranchType.DEPENDENT_NOT_EDITABLE as if it were
@@ -64,22 +109,34 @@ class RaceBranch:
         Returns:
             bool: Whether the branch is allowed to be edited.
         """
-        ok_type = self.branch_type == BranchType.DEPENDENT_EDITABLE or (
+        cache = self._editable_cache
+        if (
+            cache is not None
+            and cache[0] == _state_generation
+            and cache[1] == override_type_editable
+        ):
+            return cache[2]
+
+        # Enum members are singletons, so identity comparison skips the string
+        # equality dispatch on this hot path.
+        ok_type = self.branch_type is BranchType.DEPENDENT_EDITABLE or (
             override_type_editable
-            and self.branch_type == BranchType.DEPENDENT_NOT_EDITABLE
+            and self.branch_type is BranchType.DEPENDENT_NOT_EDITABLE
         )
         all_competitors_available = True
         if self.prev_race is not None:
             # We need to check the previous race.
             all_competitors_available = self.prev_race.branches_filled()
 
-        return (
+        editable = (
             ok_type
             and not self.is_depended_on()
             and all_competitors_available
             and self.fill_probability(include_self_filled=False)
             > FillProbability.IMPOSSIBLE
         )
+        self._editable_cache = (_state_generation, override_type_editable, editable)
+        return editable
 
     def is_depended_on(self) -> bool:
         """Checks if another race has a result and depends on the current one."""
@@ -93,21 +150,36 @@ class RaceBranch:
         )
 
     def branch_result(self) -> BranchResult:
-        """Works out if the branch is a result of a win, loss or other condition from the previous round."""
-        if (
-            self.prev_race is not None
-            and self.prev_race.loser_next_race is not None
-            and self in self.prev_race.loser_next_race.get_branches(self.prev_race)
+        """Works out if the branch is a result of a win, loss or other condition from the previous round.
+
+        The answer only changes when the race graph is rewired (e.g. an
+        auxilliary race is allocated), so it is cached against the graph
+        generation like is_editable.
+        """
+        prev_race = self.prev_race
+        if prev_race is None:
+            return BranchResult.NEITHER
+
+        cache = self._result_cache
+        if cache is not None and cache[0] == _state_generation:
+            return cache[1]
+
+        # Branches are unique objects, so compare by identity rather than
+        # invoking the generated dataclass equality on each candidate.
+        if prev_race.loser_next_race is not None and any(
+            branch is self
+            for branch in prev_race.loser_next_race.get_branches(prev_race)
         ):
-            return BranchResult.LOSER
-        elif (
-            self.prev_race is not None
-            and self.prev_race.winner_next_race is not None
-            and self in self.prev_race.winner_next_race.get_branches(self.prev_race)
+            result = BranchResult.LOSER
+        elif prev_race.winner_next_race is not None and any(
+            branch is self
+            for branch in prev_race.winner_next_race.get_branches(prev_race)
         ):
-            return BranchResult.WINNER
+            result = BranchResult.WINNER
         else:
-            return BranchResult.NEITHER
+            result = BranchResult.NEITHER
+        self._result_cache = (_state_generation, result)
+        return result
 
     def fill_probability(self, include_self_filled: bool = True) -> FillProbability:
         """Works out the probability that the branch has a competitor in it.
@@ -192,6 +264,9 @@ class RaceBranch:
 
 
 class Winnable(ABC):
+    # No attributes of its own - keeps subclasses free to use __slots__.
+    __slots__ = ()
+
     @abstractmethod
     def update_from_prev_race(
         self, prev_race: Race, competitor: Car | None, filled: bool
@@ -261,16 +336,9 @@ class Winnable(ABC):
         # Possible to add cars, we need to check each branch.
         branches = self.get_branches(filter_prev_race)
         for b in branches:
-            # Automatically treat impossible fills as filled.
-            impossible_fill = (
-                b.prev_race is not None
-                and b.prev_race.winner_probability() == FillProbability.IMPOSSIBLE
+            filled = self._branch_filled(
+                b, include_impossible, include_impossible_future
             )
-            filled = b.filled or (include_impossible and impossible_fill)
-            if not filled and impossible_fill and include_impossible_future:
-                # Check if the branch is used in the future.
-                filled = b.is_depended_on()
-
             if filled and check_any:
                 return True
 
@@ -280,6 +348,25 @@ class Winnable(ABC):
         # We got to the end and all are filled if they need to be or none are.
         return not check_any
 
+    @staticmethod
+    def _branch_filled(
+        branch: RaceBranch,
+        include_impossible: bool,
+        include_impossible_future: bool,
+    ) -> bool:
+        """Whether a single branch counts as filled for branches_filled."""
+        # Automatically treat impossible fills as filled.
+        impossible_fill = (
+            branch.prev_race is not None
+            and branch.prev_race.winner_probability() == FillProbability.IMPOSSIBLE
+        )
+        filled = branch.filled or (include_impossible and impossible_fill)
+        if not filled and impossible_fill and include_impossible_future:
+            # Check if the branch is used in the future.
+            filled = branch.is_depended_on()
+
+        return filled
+
     def winner_probability(self) -> FillProbability:
         """Returns the probability that there is a winner for the race / podium.
 
@@ -319,6 +406,8 @@ class Winnable(ABC):
 class Podium(Winnable):
     """Class for a placing in the tournament."""
 
+    __slots__ = ("position", "branch", "_branches", "_name")
+
     def __init__(
         self, position: int, prev_race: Race | None = None, car: Car | None = None
     ) -> None:
@@ -329,19 +418,24 @@ class Podium(Winnable):
             prev_race=prev_race,
             car=car,
         )
+        # Reusable tuple handed out by get_branches.
+        self._branches: Tuple[RaceBranch] = (self.branch,)
+        # The position never changes, so build the display name once.
+        self._name = self._make_name(position)
 
     def update_from_prev_race(
         self, prev_race: Race, competitor: Car | None, filled: bool
     ) -> None:
         self.branch.car = competitor
         self.branch.filled = filled
+        notify_state_changed()
 
     def get_branches(
         self, filter_prev_race: Race | None = None
     ) -> Tuple[RaceBranch] | Tuple[RaceBranch]:
         if filter_prev_race is None or self.branch.prev_race is filter_prev_race:
             # We are allowed to return the branch.
-            return (self.branch,)
+            return self._branches
         else:
             # Invalid previous race.
             raise ValueError("The provided previous race is not linked to this podium.")
@@ -349,23 +443,45 @@ class Podium(Winnable):
     def get_expected_competitors(self, min_fill_probability: FillProbability) -> int:
         return 1
 
+    def branches_filled(
+        self,
+        filter_prev_race: Race | None = None,
+        check_any: bool = False,
+        include_impossible: bool = True,
+        include_impossible_future: bool = False,
+    ) -> bool:
+        # A podium only has one branch, so test it directly rather than going
+        # through the generic loop (check_any makes no difference for one
+        # branch).
+        if (
+            filter_prev_race is not None
+            and self.branch.prev_race is not filter_prev_race
+        ):
+            raise ValueError("The provided previous race is not linked to this podium.")
+
+        return self._branch_filled(
+            self.branch, include_impossible, include_impossible_future
+        )
+
     def is_result_decided(self) -> bool:
         # return self.branch.car is not None
         return False  # We always need to be able to edit the input branch of a podium (avoids not being able to edit the results of the grand final).
 
+    @staticmethod
+    def _make_name(position: int) -> str:
+        """Builds the display name for a position (e.g. "1st place").
+
+        11th-13th take "th" rather than the suffix their last digit suggests.
+        """
+        if 11 <= position % 100 <= 13:
+            suffix = "th"
+        else:
+            suffix = {1: "st", 2: "nd", 3: "rd"}.get(position % 10, "th")
+
+        return f"{position}{suffix} place"
+
     def name(self) -> str:
-        last_digit = self.position % 10
-        match last_digit:
-            case 1:
-                suffix = "st"
-            case 2:
-                suffix = "nd"
-            case 3:
-                suffix = "rd"
-            case _:
-                suffix = "th"
-
-        return f"{self.position}{suffix} place"
+        return self._name
 
     @property
     def is_auxilliary_race(self) -> bool:
@@ -384,9 +500,34 @@ class Podium(Winnable):
         } | super().to_dict()
 
 
+def _car_none_str(car_none: Car | None) -> str:
+    """Calls repr if this is a car, puts a placeholder in otherwise.
+    Defined at module level so that repr doesn't create a new function object on each call."""
+    if car_none is None:
+        return "<___, __>"
+    else:
+        return repr(car_none)
+
+
 class Race(Winnable):
     """Class that represents a knockout race."""
 
+    __slots__ = (
+        "left_branch",
+        "right_branch",
+        "_branches",
+        "_winner_branch",
+        "_loser_branch",
+        "winner_next_race",
+        "loser_next_race",
+        "_is_auxilliary_race",
+        "_race_number",
+        "_name",
+        "_decided_cache",
+        "_bye_cache",
+        "_option_strings_cache",
+    )
+
     def __init__(
         self,
         left_branch: RaceBranch,
@@ -398,30 +539,33 @@ class Race(Winnable):
     ):
         self.left_branch = left_branch
         self.right_branch = right_branch
+        # Reusable tuple handed out by get_branches when not filtering.
+        self._branches: Tuple[RaceBranch, RaceBranch] = (left_branch, right_branch)
+        # Seeds never change after construction, so the theoretical winner and
+        # loser can be worked out once.
+        if left_branch.seed < right_branch.seed:
+            self._winner_branch, self._loser_branch = left_branch, right_branch
+        else:
+            self._winner_branch, self._loser_branch = right_branch, left_branch
         self.winner_next_race: Race | Podium | None = winner_next_race
         self.loser_next_race: Race | Podium | None = loser_next_race
-        self.race_number: int = race_number
         self._is_auxilliary_race = is_auxilliary_race
+        self.race_number = race_number  # The setter also builds the name.
+        # Cached (generation, result) pairs for is_result_decided and is_bye.
+        self._decided_cache: Tuple[int, bool] | None = None
+        self._bye_cache: Tuple[int, bool] | None = None
+        # Cached (generation, strings) for get_option_strings.
+        self._option_strings_cache: Tuple[int, Tuple[str, ...]] | None = None
 
     def theoretical_winner(self) -> RaceBranch:
-        """Calculates the theoretical winner based on seeding.
-        Returns:
-            RaceBranch: the race branch with the lowest seed.
-        """
-        if self.left_branch.seed < self.right_branch.seed:
-            return self.left_branch
-        else:
-            return self.right_branch
+        """Returns the theoretical winner based on seeding (the race branch
+        with the lowest seed), precomputed at construction."""
+        return self._winner_branch
 
     def theoretical_loser(self) -> RaceBranch:
-        """Calculates the theoretical loser based on seeding.
-        Returns:
-            RaceBranch: the race branch with the highest seed.
-        """
-        if self.left_branch.seed > self.right_branch.seed:
-            return self.left_branch
-        else:
-            return self.right_branch
+        """Returns the theoretical loser based on seeding (the race branch
+        with the highest seed), precomputed at construction."""
+        return self._loser_branch
 
     def get_branches(
         self, filter_prev_race: Race | None = None
@@ -439,11 +583,11 @@ class Race(Winnable):
         """
         if filter_prev_race is None:
             # Not filtering, everything.
-            return self.left_branch, self.right_branch
+            return self._branches
         elif filter_prev_race is self.left_branch.prev_race:
             if filter_prev_race is self.right_branch.prev_race:
                 # Both branches point to the same previous race (used in auxilliary races).
-                return self.left_branch, self.right_branch
+                return self._branches
             else:
                 # Left only.
                 return (self.left_branch,)
@@ -453,16 +597,51 @@ class Race(Winnable):
         else:
             raise ValueError("The provided previous race is not a previous race.")
 
+    def branches_filled(
+        self,
+        filter_prev_race: Race | None = None,
+        check_any: bool = False,
+        include_impossible: bool = True,
+        include_impossible_future: bool = False,
+    ) -> bool:
+        # Fast path for the common unfiltered call: test the two branches
+        # directly without the generic tuple-and-loop machinery. Once the left
+        # branch has short circuited, the result is simply the right branch.
+        if filter_prev_race is None:
+            left = self._branch_filled(
+                self.left_branch, include_impossible, include_impossible_future
+            )
+            if left == check_any:
+                return left
+
+            return self._branch_filled(
+                self.right_branch, include_impossible, include_impossible_future
+            )
+
+        return super().branches_filled(
+            filter_prev_race, check_any, include_impossible, include_impossible_future
+        )
+
     def is_bye(self) -> bool:
         """Checks if there is only a single competitor specified, makng the race a bye.
 
+        The expected competitor count walks the chain of previous races, so
+        the answer is cached until the race graph changes (see
+        notify_state_changed).
+
         Returns:
             bool: True when the race is a bye.
         """
-        return self.get_expected_competitors(FillProbability.UNLIKELY) == 1 and (
-            self.left_branch.branch_type == BranchType.FIXED
-            or self.right_branch.branch_type == BranchType.FIXED
+        cache = self._bye_cache
+        if cache is not None and cache[0] == _state_generation:
+            return cache[1]
+
+        bye = self.get_expected_competitors(FillProbability.UNLIKELY) == 1 and (
+            self.left_branch.branch_type is BranchType.FIXED
+            or self.right_branch.branch_type is BranchType.FIXED
         )
+        self._bye_cache = (_state_generation, bye)
+        return bye
 
     WINNER_EMPTY = -1
     WINNER_DNR = -2
@@ -486,79 +665,116 @@ class Race(Winnable):
             # No competitors.
             return []
 
+    def get_option_strings(self) -> Tuple[str, ...]:
+        """Returns the car ids from get_options formatted as strings.
+
+        Both the winner and loser branches pointing at this race show the same
+        options, so the formatted strings are shared and cached against the
+        graph generation rather than rebuilt per number box.
+
+        Returns:
+            Tuple[str, ...]: One string per possible winner.
+        """
+        cache = self._option_strings_cache
+        if cache is not None and cache[0] == _state_generation:
+            return cache[1]
+
+        strings = tuple(car.car_id_str for car in self.get_options())
+        self._option_strings_cache = (_state_generation, strings)
+        return strings
+
+    def _update_next(
+        self, race: Race | Podium | None, competitor: Car | None, filled: bool
+    ) -> None:
+        """Updates the next race / podium if it exists."""
+        if race is not None:
+            race.update_from_prev_race(self, competitor, filled)
+
+    def _free_auxilliary_race(self, auxilliary_manager: AuxilliaryRaceManager) -> None:
+        """Removes the auxilliary race if one is in place (the race is no longer a DNR)."""
+        if self.loser_next_race is not None and self.loser_next_race.is_auxilliary_race:
+            auxilliary_manager.free_race(self)
+
+    def mark_dnr(self, auxilliary_manager: AuxilliaryRaceManager) -> None:
+        """Marks the race as a DNR (no winner), adding an auxilliary race for
+        the losing spot if there are two competitors vying for it.
+
+        Args:
+            auxilliary_manager (AuxilliaryRaceManager): The manager to source
+                an auxilliary race from if needed.
+        """
+        self._update_next(self.winner_next_race, None, True)
+        if (
+            self.loser_next_race is not None
+            and not self.loser_next_race.is_auxilliary_race
+        ):
+            # There is a loser's race we need to deal with.
+            # We don't already have an auxilliary race in place and are allowed to add one.
+            options = self.get_options()
+            if len(options) == 2:
+                # We need to add an auxilliary race as we have 2 competitors vying to win the losing spot.
+                # Clear the current loser's race before adding the auxilliary race.
+                self._update_next(self.loser_next_race, None, False)
+                auxilliary_manager.add_race(self)
+            elif len(options) == 1:
+                # We have a single competitor. Drop then straight into the loosing spot.
+                self._update_next(self.loser_next_race, options[0], True)
+            else:
+                assert False, "There should only be 1 or 2 options."
+
+    def reset(self, auxilliary_manager: AuxilliaryRaceManager) -> None:
+        """Clears the result of the race (and any auxilliary race it added).
+
+        Args:
+            auxilliary_manager (AuxilliaryRaceManager): The manager to return
+                an auxilliary race to if one was in use.
+        """
+        self._free_auxilliary_race(auxilliary_manager)
+        self._update_next(self.winner_next_race, None, False)
+        self._update_next(self.loser_next_race, None, False)
+
     def set_winner(
         self, car_number: int, auxilliary_manager: AuxilliaryRaceManager
     ) -> None:
         """Sets the winner of the race.
 
+        The WINNER_DNR and WINNER_EMPTY sentinels are handled up front by
+        mark_dnr / reset, keeping the common case down to the two car
+        comparisons.
+
         Args:
             car_number (int): The number of the car that won the race.
 
         Raises:
-            NotImplementedError: If the race was a DNR (TODO).
             ValueError: If the car number is not part of the race.
         """
-
-        def optional_update(
-            race: Race | Podium | None, competitor: Car | None, filled: bool
-        ) -> None:
-            """Updates the next race if it exists."""
-            if race is not None:
-                race.update_from_prev_race(self, competitor, filled)
-
-        def add_dnr():
-            # This is a DNR - (no winner).
-            optional_update(self.winner_next_race, None, True)
-            if (
-                self.loser_next_race is not None
-                and not self.loser_next_race.is_auxilliary_race
-            ):
-                # There is a loser's race we need to deal with.
-                # We don't already have an auxilliary race in place and are allowed to add one.
-                options = self.get_options()
-                if len(options) == 2:
-                    # We need to add an auxilliary race as we have 2 competitors vying to win the losing spot.
-                    # Clear the current loser's race before adding the auxilliary race.
-                    optional_update(self.loser_next_race, None, False)
-                    auxilliary_manager.add_race(self)
-                elif len(options) == 1:
-                    # We have a single competitor. Drop then straight into the loosing spot.
-                    optional_update(self.loser_next_race, options[0], True)
-                else:
-                    assert False, "There should only be 1 or 2 options."
-
-        # Remove the auxilliary race if no longer a DNR.
-        if (
-            self.loser_next_race is not None
-            and self.loser_next_race.is_auxilliary_race
-            and car_number != self.WINNER_DNR
-        ):
-            # The race was, but is no longer a DNR.
-            auxilliary_manager.free_race(self)
-
-        # Options and actions.
         if car_number == self.WINNER_DNR:
             # Both failed to run.
-            add_dnr()
+            self.mark_dnr(auxilliary_manager)
+            return
 
-        elif (
-            self.left_branch.car is not None
-            and car_number == self.left_branch.car.car_id
-        ):
+        if car_number == self.WINNER_EMPTY:
+            # Reset back to empty.
+            self.reset(auxilliary_manager)
+            return
+
+        # Remove the auxilliary race if no longer a DNR.
+        self._free_auxilliary_race(auxilliary_manager)
+
+        # The competitors are bound to locals once rather than walking the
+        # branch attribute chains for each comparison (the cars cannot be
+        # cached on the race itself as they change whenever a previous race
+        # propagates its winner).
+        left_car = self.left_branch.car
+        right_car = self.right_branch.car
+        if left_car is not None and car_number == left_car.car_id:
             # Left car won.
-            optional_update(self.winner_next_race, self.left_branch.car, True)
-            optional_update(self.loser_next_race, self.right_branch.car, True)
-        elif (
-            self.right_branch.car is not None
-            and car_number == self.right_branch.car.car_id
-        ):
+            self._update_next(self.winner_next_race, left_car, True)
+            self._update_next(self.loser_next_race, right_car, True)
+        elif right_car is not None and car_number == right_car.car_id:
             # Right car won.
-            optional_update(self.winner_next_race, self.right_branch.car, True)
-            optional_update(self.loser_next_race, self.left_branch.car, True)
-        elif car_number == self.WINNER_EMPTY:
-            # Reset back to empty.
-            optional_update(self.winner_next_race, None, False)
-            optional_update(self.loser_next_race, None, False)
+            self._update_next(self.winner_next_race, right_car, True)
+            self._update_next(self.loser_next_race, left_car, True)
         else:
             # Unrecognised car.
             raise ValueError(
@@ -581,6 +797,7 @@ class Race(Winnable):
         assert len(branch) == 1, "Should only be 1 branch returned."
         branch[0].car = competitor
         branch[0].filled = filled
+        notify_state_changed()
 
     def get_expected_competitors(self, min_fill_probability: FillProbability) -> int:
         return int(self.left_branch.fill_probability() >= min_fill_probability) + int(
@@ -588,7 +805,13 @@ class Race(Winnable):
         )
 
     def is_result_decided(self) -> bool:
-        """Checks if the result for the current race is decided."""
+        """Checks if the result for the current race is decided.
+
+        The UI asks this for every branch on every redraw, so the answer is
+        cached and only recomputed after the race graph has changed."""
+        cache = self._decided_cache
+        if cache is not None and cache[0] == _state_generation:
+            return cache[1]
 
         def check_race(race: Race | Podium | None) -> bool:
             """Checks if the result of a future race have been decided."""
@@ -600,21 +823,31 @@ class Race(Winnable):
                 # Nothing here to be decided.
                 return False
 
-        return check_race(self.winner_next_race) or check_race(self.loser_next_race)
+        decided = check_race(self.winner_next_race) or check_race(self.loser_next_race)
+        self._decided_cache = (_state_generation, decided)
+        return decided
 
     def __repr__(self) -> str:
-        def car_none_str(car_none: Car | None):
-            """Calls repr if this is a car, puts a placeholder in otherwise."""
-            if car_none is None:
-                return "<___, __>"
-            else:
-                return repr(car_none)
+        # Bind the branches to locals so each is only looked up once.
+        left = self.left_branch
+        right = self.right_branch
+        return f"{self.name()}({left.seed:>2d} {_car_none_str(left.car)}, {right.seed:>2d} {_car_none_str(right.car)})"
 
-        return f"{self.name()}({self.left_branch.seed:>2d} {car_none_str(self.left_branch.car)}, {self.right_branch.seed:>2d} {car_none_str(self.right_branch.car)})"
+    @property
+    def race_number(self) -> int:
+        """The number of the race, assigned in play order by number_races."""
+        return self._race_number
+
+    @race_number.setter
+    def race_number(self, value: int) -> None:
+        # The number only changes when the event is (re)numbered, so build the
+        # name here rather than formatting it on every name() call.
+        self._race_number = value
+        prefix = "AR" if self._is_auxilliary_race else "R"
+        self._name = f"{prefix}{value}"
 
     def name(self) -> str:
-        prefix = "AR" if self.is_auxilliary_race else "R"
-        return f"{prefix}{self.race_number}"
+        return self._name
 
     @property
     def is_auxilliary_race(self) -> bool:
@@ -689,6 +922,8 @@ class LoadingBranch(RaceBranch, Loading):
         if self._placeholder_car is not None:
             self.car = cars[self._placeholder_car]
 
+        notify_state_changed()
+
 
 class LoadingRace(Race, Loading):
     """A Race object with extra placeholders for loading."""
@@ -758,6 +993,8 @@ class LoadingPodium(Podium, Loading):
     def __init__(self, dictionary: Dict[Podium.Fields, Any]) -> None:
         self.position = dictionary[Podium.Fields.POSITION]
         self.branch = LoadingBranch(dictionary[Podium.Fields.BRANCH])
+        self._branches = (self.branch,)
+        self._name = self._make_name(self.position)
 
     @classmethod
     def load_podiums_from_dict(
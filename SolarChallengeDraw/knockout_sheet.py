@@ -3,10 +3,10 @@ Classes and tools to render a knockout event and export it as a PDF.
 Written by Jotham Gates, 09/11/2025"""
 
 from __future__ import annotations
+import math
 import os
 import subprocess
 from typing import List, Literal, Tuple, cast
-import numpy as np
 import ttkbootstrap as ttk
 import ttkbootstrap.constants as ttkc
 from tkinter import simpledialog
@@ -28,11 +28,12 @@ from knockout_sheet_elements import (
     BOTTOM_MARGIN,
     BRACKET_VERTICAL_SEPARATION,
     FIRST_COLUMN_HINT_WIDTH,
-    FONT,
-    FONT_NORMAL_SIZE,
-    FONT_SMALL_SIZE,
+    FONT_NORMAL_BOLD,
     FONT_SUPTITLE_SIZE,
     FONT_TITLE_SIZE,
+    FONT_SUPTITLE,
+    FONT_SUPTITLE_BOLD,
+    FONT_TITLE,
     HORIZONTAL_LINE_LENGTH,
     LABEL_HEIGHT,
     LABEL_WIDTH,
@@ -55,12 +56,25 @@ from knockout_sheet_elements import (
     RaceDrawing,
     COLUMN_WIDTH,
     ShowFromArrow,
+    font_linespace,
 )
 
+# The A paper aspect ratio. A plain float avoids a NumPy ufunc dispatch for
+# scalar maths every time the sheet is resized.
+_SQRT2 = math.sqrt(2)
+
+
+def _mm_to_pt(mm: float) -> float:
+    """Converts mm to post script points (1/72")"""
+    return mm * 72 / 25.4
+
 
 class KnockoutSheet:
     """Class that draws and manages the knockout tree structure."""
 
+    # Ghostscript arguments that do not vary between exports.
+    _GS_STATIC_ARGS = ("-dNOPAUSE", "-dBATCH", "-dSAFER", "-sDEVICE=pdfwrite")
+
     def __init__(
         self,
         frame: ttk.Frame | ttk.Window,
@@ -76,6 +90,18 @@ class KnockoutSheet:
         self.canvas = ttk.Canvas(self._frame, width=self._width, height=self._height)
         self._races: List[RaceDrawing] = []
         self._aux_races: AuxilliaryRaceSheet
+        # Comboboxes are expensive Tk widgets, so they are pooled across
+        # redraws instead of being recreated (and previously leaked) each time
+        # the sheet is drawn.
+        self._combobox_pool: List[ttk.Combobox] = []
+        self._used_comboboxes: List[ttk.Combobox] = []
+        self._update_pending = False
+        self._pending_draw_args: (
+            Tuple[KnockoutEvent, NumberBoxFactory, bool] | None
+        ) = None
+        # Whether the canvas may have changed since it was last rendered for
+        # export (lets repeated exports skip pumping the Tk event queue).
+        self._dirty = True
 
         # Add to the screen.
         if start_row is not None and start_column is not None:
@@ -147,22 +173,53 @@ class KnockoutSheet:
     def draw_canvas(
         self, event: KnockoutEvent, numbers: NumberBoxFactory, show_seed: bool = True
     ) -> None:
-        """Draws the knockout event on the canvas.
+        """Schedules the knockout event to be drawn on the canvas.
+
+        The (expensive) full draw is deferred until Tk is next idle, so a
+        burst of calls collapses into a single draw of the latest arguments.
+        Anything that needs the finished drawing (export, update) flushes
+        pending idle callbacks first.
 
         Args:
             event (KnockoutEvent): The event to plot.
         """
-        self._clear()
-        suptitle_bottom = self.draw_title(event)
-        self.draw_tree(
-            event=event,
-            numbers=numbers,
-            show_seed=show_seed,
-            x_offset=AUX_RACES_SECTION_WIDTH + LEFT_MARGIN + TEXT_MARGIN,
-            y_offset=suptitle_bottom + 45,
-        )
-        self.draw_notes(event, self._width - RIGHT_MARGIN, self._height - BOTTOM_MARGIN)
-        self.draw_aux_races(event, numbers, suptitle_bottom)
+        scheduled = self._pending_draw_args is not None
+        self._pending_draw_args = (event, numbers, show_seed)
+        if not scheduled:
+            self.canvas.after_idle(self._perform_draw)
+
+    def _perform_draw(self) -> None:
+        """Performs the full draw scheduled by draw_canvas()."""
+        assert self._pending_draw_args is not None, "No draw has been scheduled."
+        self._dirty = True
+        event, numbers, show_seed = self._pending_draw_args
+        self._pending_draw_args = None
+
+        # Unmap the canvas while the hundreds of items are created so Tk only
+        # processes a single exposure when the finished sheet reappears,
+        # rather than scheduling incremental redraws as each item lands.
+        mapped = self.canvas.winfo_manager() == "grid"
+        if mapped:
+            self.canvas.grid_remove()
+        try:
+            self._clear()
+            suptitle_bottom = self.draw_title(event)
+            self.draw_tree(
+                event=event,
+                numbers=numbers,
+                show_seed=show_seed,
+                x_offset=AUX_RACES_SECTION_WIDTH + LEFT_MARGIN + TEXT_MARGIN,
+                y_offset=suptitle_bottom + 45,
+            )
+            self.draw_notes(
+                event, self._width - RIGHT_MARGIN, self._height - BOTTOM_MARGIN
+            )
+            self.draw_aux_races(event, numbers, suptitle_bottom)
+        finally:
+            if mapped:
+                # grid_remove remembered the grid options, so this restores
+                # the canvas exactly where it was.
+                self.canvas.grid()
 
     def draw_notes(self, event: KnockoutEvent, x: float, y: float) -> None:
         notes_box = NotesBox(self.canvas, (x - 450, y - 300), (x, y))
@@ -190,8 +247,8 @@ class KnockoutSheet:
         event: KnockoutEvent,
     ) -> float:
         """Draws the main title."""
-        NORMAL_TITLE_FONT = (FONT, FONT_SUPTITLE_SIZE)
-        HOVER_TITLE_FONT = (FONT, FONT_SUPTITLE_SIZE, "bold")
+        NORMAL_TITLE_FONT = FONT_SUPTITLE
+        HOVER_TITLE_FONT = FONT_SUPTITLE_BOLD
         # Titles
         text_id = self.canvas.create_text(
             LEFT_MARGIN,
@@ -200,7 +257,9 @@ class KnockoutSheet:
             font=NORMAL_TITLE_FONT,
             anchor=ttkc.NW,
         )
-        _, _, _, suptitle_bottom = self.canvas.bbox(text_id)
+        # The title is a single line, so its bottom follows from the cached
+        # font metrics without a bbox query.
+        suptitle_bottom = TOP_MARGIN + font_linespace(FONT_SUPTITLE_SIZE)
 
         def edit_title(_) -> None:
             """Creates a popup to edit the event title."""
@@ -286,13 +345,15 @@ class KnockoutSheet:
                     anchor=ttkc.S,
                     text=round_name,
                     width=2 * box_half_width - 2 * TEXT_MARGIN,
-                    font=(FONT, FONT_NORMAL_SIZE, "bold"),
+                    font=FONT_NORMAL_BOLD,
                     fill=TEXT_FILL,
                 )
             )
             box_top = text_y_top - TEXT_MARGIN
             box_bottom = y_centre - offset + (height / 2) + BOX_PADDING
-            rect = self.canvas.create_rectangle(
+            # Tagged so that all of the boxes can be pushed behind the rest of
+            # the drawing in one display list pass at the end of draw_tree.
+            self.canvas.create_rectangle(
                 box_centre - box_half_width,
                 box_top,
                 box_centre + box_half_width,
@@ -300,8 +361,8 @@ class KnockoutSheet:
                 width=0,
                 fill=BOX_FILL,
                 outline=BOX_FILL,
+                tags=("roundbox",),
             )
-            self.canvas.tag_lower(rect)
 
             return box_centre, box_top - SHORT_TEXT_MARGIN, box_bottom + SHORT_TEXT_MARGIN
 
@@ -375,23 +436,31 @@ class KnockoutSheet:
                                                                        arrows to for event order hints.
             """
 
-            def y_spacing(index) -> float:
-                return y_spacing_initial * (2**index)
+            # The spacing doubles every round; 1 << i keeps the doubling in
+            # integer arithmetic and the table saves recomputing it for every
+            # use below.
+            spacings = [y_spacing_initial * (1 << i) for i in range(len(rounds))]
 
             event_arrow_attachment: List[Tuple[float, float, float]] = (
                 []
             )  # Points to attach arrows to.
 
+            # Each height is needed twice (current round and look-ahead), so
+            # compute them all once up front.
+            heights = [round_height(r, spacings[i]) for i, r in enumerate(rounds)]
+
+            # The first and second rounds are a single column wide, all
+            # subsequent are 2 to line up with the losers' rounds.
+            cols_wide = (1, 1) + (2,) * (len(rounds) - 2)
+
             next_x = x
             for i, round in enumerate(rounds):
-                # Make the round a single column wide for the first and second rounds, 2 for all subsequent to line up with the losers' round.
-                cols_wide = 1 if i < 2 else 2
                 next_x = draw_round(
                     x=next_x,
                     y_centre=y_centre,
-                    y_spacing=y_spacing(i),
+                    y_spacing=spacings[i],
                     round=round,
-                    columns_wide=cols_wide,
+                    columns_wide=cols_wide[i],
                     show_result_box=False,
                     show_from_arrow=(ShowFromArrow.HIDE, ShowFromArrow.HIDE),
                     show_winner_label=False,
@@ -402,12 +471,10 @@ class KnockoutSheet:
                     draw_round_box(
                         x_end=next_x,
                         y_centre=y_centre,
-                        height=round_height(round, y_spacing(i)),
+                        height=heights[i],
                         offset=0,
                         next_round_height=(
-                            0
-                            if i + 1 == len(rounds)
-                            else round_height(rounds[i + 1], y_spacing(i + 1))
+                            0 if i + 1 == len(rounds) else heights[i + 1]
                         ),
                         next_round_offset=0,
                         round_name=f"P{i+1}",
@@ -437,19 +504,21 @@ class KnockoutSheet:
                                                                        arrows to for event order hints.
             """
 
-            def y_spacing(index: int) -> float:
-                """Calculates the required spacing for a round."""
-                return y_spacing_initial * (2 ** (index // 2))
+            # The spacing doubles every second round; as for the winners'
+            # bracket the table is computed once. The extra entries cover the
+            # look-ahead uses below.
+            spacings = [
+                y_spacing_initial * (1 << (i // 2)) for i in range(len(rounds) + 2)
+            ]
 
             def y_offset(index: int) -> float:
-                """Calculates the required offset for a round."""
-                index += 1
+                """Calculates the required offset for a round.
+
+                The offset accumulates a quarter of every second spacing, a
+                doubling series with the closed form below.
+                """
                 assert index >= 0, "Index shouldn't be negative."
-                index &= 0xFFFE  # Round down to the nearest multiple of 2.
-                if index == 0:
-                    return 0
-                else:
-                    return y_spacing(index - 1) / 4 + y_offset(index - 2)
+                return y_spacing_initial * ((1 << ((index + 1) >> 1)) - 1) / 4
 
             def show_from_arrows_needed(
                 index: int,
@@ -469,12 +538,15 @@ class KnockoutSheet:
                 []
             )  # Points to attach arrows to.
 
+            # As for the winners' bracket, each height is needed twice.
+            heights = [round_height(r, spacings[i]) for i, r in enumerate(rounds)]
+
             next_x = x
             for i, round in enumerate(rounds):
                 next_x = draw_round(
                     x=next_x,
                     y_centre=y_centre - y_offset(i),
-                    y_spacing=y_spacing(i),
+                    y_spacing=spacings[i],
                     round=round,
                     columns_wide=1,
                     show_result_box=False,
@@ -486,12 +558,10 @@ class KnockoutSheet:
                     draw_round_box(
                         x_end=next_x,
                         y_centre=y_centre,
-                        height=round_height(round, y_spacing(i)),
+                        height=heights[i],
                         offset=y_offset(i),
                         next_round_height=(
-                            0
-                            if i + 1 == len(rounds)
-                            else round_height(rounds[i + 1], y_spacing(i + 1))
+                            0 if i + 1 == len(rounds) else heights[i + 1]
                         ),
                         next_round_offset=y_offset(i + 1),
                         round_name=f"SC{i+1}",
@@ -548,16 +618,16 @@ class KnockoutSheet:
 
             return right_side + TEXT_MARGIN + LABEL_WIDTH, attach_points
 
-        # Winners' bracket.
-        _, _, _, winners_title_bottom = self.canvas.bbox(
-            self.canvas.create_text(
-                x_offset,
-                y_offset + TEXT_MARGIN,
-                text="Primary draw",
-                font=(FONT, FONT_TITLE_SIZE),
-                anchor=ttkc.NW,
-            )
+        # Winners' bracket. The titles are single lines, so their bottoms
+        # follow from the cached font metrics without bbox queries.
+        self.canvas.create_text(
+            x_offset,
+            y_offset + TEXT_MARGIN,
+            text="Primary draw",
+            font=FONT_TITLE,
+            anchor=ttkc.NW,
         )
+        winners_title_bottom = y_offset + TEXT_MARGIN + font_linespace(FONT_TITLE_SIZE)
         winners_height = round_height(event.winners_bracket[0], WINNERS_INITIAL_SPACING)
         winners_centreline = (
             winners_title_bottom + TEXT_MARGIN + winners_height / 2 + LABEL_HEIGHT / 2
@@ -576,14 +646,15 @@ class KnockoutSheet:
             + LABEL_HEIGHT
             + BRACKET_VERTICAL_SEPARATION
         )
-        _, _, _, losers_title_bottom = self.canvas.bbox(
-            self.canvas.create_text(
-                x_offset,
-                winners_bottom + TEXT_MARGIN,
-                text="Second chance draw",
-                font=(FONT, FONT_TITLE_SIZE),
-                anchor=ttkc.NW,
-            )
+        self.canvas.create_text(
+            x_offset,
+            winners_bottom + TEXT_MARGIN,
+            text="Second chance draw",
+            font=FONT_TITLE,
+            anchor=ttkc.NW,
+        )
+        losers_title_bottom = (
+            winners_bottom + TEXT_MARGIN + font_linespace(FONT_TITLE_SIZE)
         )
         losers_height = round_height(event.losers_bracket[0], LOSERS_INITIAL_SPACING)
         losers_centreline = (
@@ -613,6 +684,12 @@ class KnockoutSheet:
             gf_arrow_attach,
         )
 
+        # Push the decorations to the back in one pass per group instead of
+        # reordering the display list once per item. The boxes are lowered
+        # first so the arrows end up underneath them, as before.
+        self.canvas.tag_lower("roundbox")
+        self.canvas.tag_lower("orderarrow")
+
         # Scaling, width and height.
         drawing_width += RIGHT_MARGIN
         drawing_height = (
@@ -672,28 +749,55 @@ class KnockoutSheet:
         EventStartArrow(self, get_coord_set(order[0], False))
 
     def update(self) -> None:
-        """Updates each item on the sheet."""
-        # print("Not updating here.")
+        """Schedules a refresh of every item on the sheet.
 
-        # def manual_update(self) -> None:
+        The refresh is deferred to when Tk is next idle so that a burst of
+        calls (e.g. every keystroke in a combobox, or a paste) is coalesced
+        into a single pass over the sheet.
+        """
+        if not self._update_pending:
+            self._update_pending = True
+            self.canvas.after_idle(self._do_update)
+
+    def _do_update(self) -> None:
+        """Performs the actual refresh scheduled by update()."""
+        self._update_pending = False
+        self._dirty = True
         for drawing in self._races:
             drawing.update()
 
         self._aux_races.update()
 
-        # self._frame.after(2000, self.manual_update)
+    def acquire_combobox(self) -> ttk.Combobox:
+        """Returns a combobox from the pool, creating one if none are free.
+
+        The caller is expected to configure it (values, textvariable,
+        validation) for its new role. It is returned to the pool on the next
+        _clear().
+        """
+        if self._combobox_pool:
+            combobox = self._combobox_pool.pop()
+        else:
+            combobox = ttk.Combobox(self.canvas)
+
+        self._used_comboboxes.append(combobox)
+        return combobox
 
     def _clear(self) -> None:
         """Clears everything from the canvas.
         This may not be 100% memory leak free, so minimise the use of this."""
         self.canvas.delete("all")
         self._races = []
+        # Deleting the window items unmapped the embedded comboboxes; keep the
+        # widgets for the next draw rather than abandoning them.
+        self._combobox_pool.extend(self._used_comboboxes)
+        self._used_comboboxes = []
 
     def a_paper_scale(self, min_dimensions: Tuple[float, float]) -> Tuple[float, float]:
         """Calculates the minimum size in the A paper ratio."""
         min_width, min_height = min_dimensions
-        height = max(min_height, min_width / np.sqrt(2))
-        width = height * np.sqrt(2)
+        height = max(min_height, min_width / _SQRT2)
+        width = height * _SQRT2
         return width, height
 
     def set_size(self, dimensions: Tuple[float, float]) -> None:
@@ -743,7 +847,17 @@ class KnockoutSheet:
         # Export as postscript.
         postscript_file = output + ".ps"
         pdf_file = output + ".pdf"
-        self.canvas.update()
+        # Flush pending idle work (scheduled draws and refreshes) so the
+        # postscript reflects the latest state. When nothing is outstanding -
+        # e.g. exporting the same sheet at a second paper size - the event
+        # queue pump is skipped entirely.
+        if (
+            self._dirty
+            or self._update_pending
+            or self._pending_draw_args is not None
+        ):
+            self.canvas.update()
+            self._dirty = False
         postscript: str = self.canvas.postscript(
             x=0,
             y=0,
@@ -754,26 +868,16 @@ class KnockoutSheet:
             pageanchor=ttkc.NE,
         )
 
-        if save_ps:
-            # We need to save the postscript file.
-            with open(postscript_file, "w") as file:
-                file.write(postscript)
-
+        process: subprocess.Popen | None = None
         if generate_pdf:
-            # We need to generate the PDF.
-            def mm_to_pt(mm: float) -> float:
-                """Converts mm to post script points (1/72")"""
-                return mm * 72 / 25.4
-
+            # We need to generate the PDF. Only the output file and page size
+            # vary between exports; the remaining flags are shared.
             args = [
                 ghostscript_path,
-                "-dNOPAUSE",
-                "-dBATCH",
-                "-dSAFER",
-                "-sDEVICE=pdfwrite",
+                *self._GS_STATIC_ARGS,
                 f"-sOutputFile={pdf_file}",
-                f"-dDEVICEWIDTHPOINTS={mm_to_pt(pdf_width_mm):f}",
-                f"-dDEVICEHEIGHTPOINTS={mm_to_pt(pdf_height_mm):f}",
+                f"-dDEVICEWIDTHPOINTS={_mm_to_pt(pdf_width_mm):f}",
+                f"-dDEVICEHEIGHTPOINTS={_mm_to_pt(pdf_height_mm):f}",
                 "-dFitPage",
                 "-",
             ]
@@ -785,7 +889,34 @@ class KnockoutSheet:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.DEVNULL if surpress_output else None,
             )
-            process.communicate(postscript.encode(), timeout=30)
-            process.wait()
+
+        if save_ps or process is not None:
+            # Stream the postscript out in chunks, teeing to the file and to
+            # Ghostscript in a single pass. Ghostscript starts parsing while
+            # the rest is still being written and nothing holds a second full
+            # copy of the (potentially large) document.
+            CHUNK_SIZE = 1 << 16
+            postscript_bytes = postscript.encode()
+            ps_file = open(postscript_file, "wb") if save_ps else None
+            try:
+                for start in range(0, len(postscript_bytes), CHUNK_SIZE):
+                    chunk = postscript_bytes[start : start + CHUNK_SIZE]
+                    if ps_file is not None:
+                        ps_file.write(chunk)
+                    if process is not None:
+                        assert process.stdin is not None, "stdin is a pipe."
+                        process.stdin.write(chunk)
+            finally:
+                if ps_file is not None:
+                    ps_file.close()
+
+            if process is not None:
+                assert process.stdin is not None, "stdin is a pipe."
+                process.stdin.close()
+                returncode = process.wait(timeout=30)
+                if returncode:
+                    # Fail loudly (as subprocess.run(check=True) would)
+                    # rather than silently returning with no PDF written.
+                    raise subprocess.CalledProcessError(returncode, args)
 
         return postscript
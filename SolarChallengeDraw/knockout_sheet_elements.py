@@ -5,7 +5,9 @@ Written by Jotham Gates, 29/11/2025"""
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from enum import Enum, StrEnum, auto
+from functools import lru_cache
 import tkinter as tk
+from tkinter import font as tkfont
 from typing import Iterable, List, Literal, Tuple, TYPE_CHECKING, Type, cast
 import numpy as np
 import ttkbootstrap as ttk
@@ -25,6 +27,7 @@ from knockout_race import (
     FillProbability,
     Race,
     BranchType,
+    state_generation,
 )
 
 # Settings
@@ -39,9 +42,21 @@ FONT_NORMAL_SIZE = 10
 FONT_TITLE_SIZE = 15
 FONT_SUPTITLE_SIZE = 30
 HORIZONTAL_LINE_LENGTH = 20
+# Shared font tuples so that Tk resolves each spec once rather than on every
+# draw call.
+FONT_SMALL = (FONT, FONT_SMALL_SIZE)
+FONT_SMALL_ITALIC = (FONT, FONT_SMALL_SIZE, "italic")
+FONT_NORMAL = (FONT, FONT_NORMAL_SIZE)
+FONT_NORMAL_BOLD = (FONT, FONT_NORMAL_SIZE, "bold")
+FONT_TITLE = (FONT, FONT_TITLE_SIZE)
+FONT_SUPTITLE = (FONT, FONT_SUPTITLE_SIZE)
+FONT_SUPTITLE_BOLD = (FONT, FONT_SUPTITLE_SIZE, "bold")
 LABEL_WIDTH = 100
 LABEL_HEIGHT = 30
-SHORT_TEXT_MARGIN = TEXT_MARGIN / 2
+# Floor division keeps this (and everything derived from it) an int, so x
+# coordinates reach Tk as ints rather than whole-valued floats that Tcl has
+# to convert back.
+SHORT_TEXT_MARGIN = TEXT_MARGIN // 2
 WINNERS_INITIAL_SPACING = 55
 LOSERS_INITIAL_SPACING = 80
 TEXT_LINE_HEIGHT = 12
@@ -56,6 +71,42 @@ COLUMN_WIDTH = LABEL_WIDTH + 2 * TEXT_MARGIN + 2 * HORIZONTAL_LINE_LENGTH
 AUX_RACES_SECTION_WIDTH = (
     COLUMN_WIDTH + LABEL_WIDTH + 2 * TEXT_MARGIN + HINT_ARROW_WIDTH
 )
+# Offset from the left of a race to the start of its bracket lines.
+BRACKET_START_OFFSET = LABEL_WIDTH + TEXT_MARGIN
+
+
+@lru_cache(maxsize=None)
+def font_linespace(size: int) -> int:
+    """The line height in pixels of the sheet font at the given size.
+
+    This lets single line text be placed without a canvas bbox query per
+    item. A Tk interpreter must exist before this is first called, so it is
+    not evaluated at import time.
+
+    Args:
+        size (int): The font size in points.
+
+    Returns:
+        int: The line height in pixels.
+    """
+    return tkfont.Font(family=FONT, size=size).metrics("linespace")
+
+
+@lru_cache(maxsize=None)
+def bracket_end_offset(columns_wide: int) -> int:
+    """Offset from the left of a race to the right hand end of its bracket.
+
+    Args:
+        columns_wide (int): The number of columns the bracket spans.
+
+    Returns:
+        int: The offset in pixels.
+    """
+    return (
+        BRACKET_START_OFFSET
+        + 2 * HORIZONTAL_LINE_LENGTH
+        + (columns_wide - 1) * COLUMN_WIDTH
+    )
 
 
 class NumberBox(ABC):
@@ -83,6 +134,9 @@ class NumberBox(ABC):
         self._aux_race_manager = aux_race_manager
         self._sheet = sheet
         self._override_type_editable = override_type_editable
+        # Cached (generation, options) so that every update of every box does
+        # not rebuild the same list (see knockout_race.state_generation).
+        self._options_cache: Tuple[int, List[str]] | None = None
         self._draw(x, y)
 
     @abstractmethod
@@ -102,6 +156,7 @@ class NumberBox(ABC):
 
     def set_race_branch(self, branch: RaceBranch | None) -> None:
         self._race_branch = branch
+        self._options_cache = None  # The options belong to the old branch.
         self.update()
 
     class StrFixedOptions(StrEnum):
@@ -115,12 +170,18 @@ class NumberBox(ABC):
         Returns:
             List[str]: A list of values to show in the dropdown.
         """
+        cache = self._options_cache
+        generation = state_generation()
+        if cache is not None and cache[0] == generation:
+            return cache[1]
+
         if self._race_branch is not None:
             # A valid race branch has been provided.
             if self._race_branch.prev_race is not None:
-                values = self._race_branch.prev_race.get_options()
+                # Shared, pre-formatted per race rather than per box.
+                car_strings = self._race_branch.prev_race.get_option_strings()
             else:
-                values = []
+                car_strings = ()
 
             if (
                 not self._race_branch.is_editable(self._override_type_editable)
@@ -131,23 +192,25 @@ class NumberBox(ABC):
             else:
                 na_list = []
 
-            values = (
+            options = (
                 [self.StrFixedOptions.EMPTY]
-                + [f"{i.car_id}" for i in values]
+                + list(car_strings)
                 + [self.StrFixedOptions.DNR]
                 + na_list
             )
-            return values
         else:
             # No race branch has been provided to generate options.
-            return [self.StrFixedOptions.EMPTY]
+            options = [self.StrFixedOptions.EMPTY]
+
+        self._options_cache = (generation, options)
+        return options
 
     def _display_text(self) -> str:
         """Returns a string for the text that should be displayed in the box."""
         if self._race_branch is not None:
             # Normal, race branch provided.
             if self._race_branch.car is not None:
-                text = f"{self._race_branch.car.car_id}"
+                text = self._race_branch.car.car_id_str
             elif self._race_branch.filled:
                 # Filled as empty (DNR)
                 text = self.StrFixedOptions.DNR
@@ -254,8 +317,15 @@ class InteractiveNumberBox(NumberBox):
             if not self._in_update:
                 update_races(current_var.get())
 
-        self._combobox = ttk.Combobox(
-            self._sheet.canvas,
+        # Reuse a pooled combobox where possible - creating these is one of
+        # the more expensive parts of drawing the sheet.
+        self._combobox = self._sheet.acquire_combobox()
+        # What the combobox was last told to show, so that update() only makes
+        # Tk calls for the parts that actually changed.
+        self._last_options: List[str] | None = None
+        self._last_state: str | None = None
+        self._last_text: str | None = None
+        self._combobox.configure(
             validate="all",
             validatecommand=(self._sheet.canvas.register(validate), "%P"),
             textvariable=current_var,
@@ -277,10 +347,22 @@ class InteractiveNumberBox(NumberBox):
     def update(self) -> None:
         self._in_update = True
         options = self._get_options()
-        self._combobox["values"] = options
-        self._combobox["state"] = self._combobox_state()
-        # Show the current car if needed.
-        self._combobox.current(options.index(self._display_text()))
+        if options != self._last_options:
+            self._combobox["values"] = options
+            self._last_options = options
+
+        state = self._combobox_state()
+        if state != self._last_state:
+            self._combobox["state"] = state
+            self._last_state = state
+
+        # Show the current car if needed. The text is compared rather than the
+        # index as the same index can name a different car once the options
+        # list changes.
+        text = self._display_text()
+        if text != self._last_text:
+            self._combobox.current(options.index(text))
+            self._last_text = text
         self._in_update = False
 
 
@@ -288,25 +370,53 @@ class PrintNumberBox(NumberBox):
     """Class that draws a box around a number that can be printed but is not editable."""
 
     def _draw(self, x: float, y: float) -> None:
+        # The initial text and style are passed straight to the create calls
+        # rather than itemconfigured afterwards, halving the Tk calls per box
+        # on the (bulk) print drawing path.
+        if self._race_branch is None:
+            fill_probability = FillProbability.IMPOSSIBLE
+        else:
+            fill_probability = self._race_branch.fill_probability()
+        dash, outline = fill_probability_style(fill_probability)
+        text = self._display_text()
+
         self._rectangle = self._sheet.canvas.create_rectangle(
-            x, y - LABEL_HEIGHT / 2, x + LABEL_WIDTH, y + LABEL_HEIGHT / 2, fill="#fff"
+            x,
+            y - LABEL_HEIGHT / 2,
+            x + LABEL_WIDTH,
+            y + LABEL_HEIGHT / 2,
+            fill="#fff",
+            dash=dash,
+            outline=outline,
         )
         self._text = self._sheet.canvas.create_text(
             x + LABEL_WIDTH / 2,
             y,
             anchor=ttkc.CENTER,
-            font=(FONT, FONT_NORMAL_SIZE),
+            font=FONT_NORMAL,
+            text=text,
         )
-        self.update()
+        # What is currently shown, so unchanged boxes skip their Tk calls.
+        self._last_text: str | None = text
+        self._last_style: Tuple[tuple, str] | None = (dash, outline)
 
     def update(self) -> None:
-        self._sheet.canvas.itemconfigure(self._text, text=self._display_text())
+        text = self._display_text()
+        if text != self._last_text:
+            self._sheet.canvas.itemconfigure(self._text, text=text)
+            self._last_text = text
+
         if self._race_branch is None:
             fill_probability = FillProbability.IMPOSSIBLE
         else:
             fill_probability = self._race_branch.fill_probability()
-        dash, outline = fill_probability_style(fill_probability)
-        self._sheet.canvas.itemconfigure(self._rectangle, dash=dash, outline=outline)
+        style = fill_probability_style(fill_probability)
+        if style != self._last_style:
+            dash, outline = style
+            self._sheet.canvas.itemconfigure(
+                self._rectangle, dash=dash, outline=outline
+            )
+            self._last_style = style
 
 
 class InitialNumberBox(NumberBox):
@@ -321,7 +431,7 @@ class InitialNumberBox(NumberBox):
             anchor=ttkc.E,
             width=LABEL_WIDTH,
             text=self._line1_text(),
-            font=(FONT, FONT_NORMAL_SIZE),
+            font=FONT_NORMAL,
         )
         self._line2 = self._sheet.canvas.create_text(
             x + LABEL_WIDTH,
@@ -329,14 +439,17 @@ class InitialNumberBox(NumberBox):
             anchor=ttkc.E,
             width=LABEL_WIDTH,
             text=self._line2_text(),
-            font=(FONT, FONT_SMALL_SIZE, "italic"),
+            font=FONT_SMALL_ITALIC,
         )
+        # The text already drawn, so update() only touches Tk on change.
+        self._last_line1 = self._line1_text()
+        self._last_line2 = self._line2_text()
 
     def _line1_text(self) -> str:
         assert (
             self._race_branch is not None and self._race_branch.car is not None
         ), "The initial number box cannot cope with no RaceBranch provided or None car ID currently."
-        return f"{self._race_branch.car.car_id}"
+        return self._race_branch.car.car_id_str
 
     def _line2_text(self) -> str:
         assert (
@@ -345,8 +458,15 @@ class InitialNumberBox(NumberBox):
         return f"{self._race_branch.car.car_name}"
 
     def update(self) -> None:
-        self._sheet.canvas.itemconfigure(self._line1, text=self._line1_text())
-        self._sheet.canvas.itemconfigure(self._line2, text=self._line2_text())
+        line1 = self._line1_text()
+        if line1 != self._last_line1:
+            self._sheet.canvas.itemconfigure(self._line1, text=line1)
+            self._last_line1 = line1
+
+        line2 = self._line2_text()
+        if line2 != self._last_line2:
+            self._sheet.canvas.itemconfigure(self._line2, text=line2)
+            self._last_line2 = line2
 
 
 class NumberBoxFactory(ABC):
@@ -510,25 +630,32 @@ class BracketLineSetNormal(BracketLineSet):
         # Line from the right side of the bracket to the end.
         tee_x = x_end - HORIZONTAL_LINE_LENGTH
 
-        # Top lines
+        # Each branch's horizontal approach and vertical tee segment are drawn
+        # as a single polyline - they always share a style, so this halves the
+        # number of canvas items per race.
         top_y = y_centre - y_separation / 2
         self._top_lines = (
             canvas.create_line(
-                x_start, top_y, tee_x, top_y, width=BRACKET_LINE_THICKNESS
-            ),
-            canvas.create_line(
-                tee_x, top_y, tee_x, y_centre, width=BRACKET_LINE_THICKNESS
+                x_start,
+                top_y,
+                tee_x,
+                top_y,
+                tee_x,
+                y_centre,
+                width=BRACKET_LINE_THICKNESS,
             ),
         )
 
-        # Bottom lines
         bottom_y = y_centre + y_separation / 2
         self._bottom_lines = (
             canvas.create_line(
-                x_start, bottom_y, tee_x, bottom_y, width=BRACKET_LINE_THICKNESS
-            ),
-            canvas.create_line(
-                tee_x, y_centre, tee_x, bottom_y, width=BRACKET_LINE_THICKNESS
+                x_start,
+                bottom_y,
+                tee_x,
+                bottom_y,
+                tee_x,
+                y_centre,
+                width=BRACKET_LINE_THICKNESS,
             ),
         )
 
@@ -571,6 +698,10 @@ class BracketLineSetBye(BracketLineSet):
 class NotesBox:
     """Class that handles items in the notes box."""
 
+    # Shared font tuples so they are not rebuilt for every line of text.
+    BODY_FONT = FONT_NORMAL
+    HEADING_FONT = FONT_TITLE
+
     def __init__(
         self,
         canvas: ttk.Canvas,
@@ -602,7 +733,7 @@ class NotesBox:
         """
         # Specify the font if left blank.
         if font is None:
-            font = (FONT, FONT_NORMAL_SIZE)
+            font = self.BODY_FONT
 
         # Positions and widths
         # Defaults for no bullet point.
@@ -640,11 +771,11 @@ class NotesBox:
         line = line.strip()
 
         # Headings and bullet points.
-        font = (FONT, FONT_NORMAL_SIZE)
+        font = self.BODY_FONT
         bullet = False
         if line.startswith("#"):
             # Title.
-            font = (FONT, FONT_TITLE_SIZE)
+            font = self.HEADING_FONT
             line = line.lstrip("# ")
         elif line.startswith("-"):
             # Bullet point.
@@ -656,14 +787,21 @@ class NotesBox:
     def read_markdown(self, filename: str) -> None:
         """Reads a markdown file.
 
-        The parser is extremely basic.
+        The parser is extremely basic. The file is read once and cached, so
+        repeated redraws of the same notes do not touch the disk again.
 
         Args:
             filename (str): The name of the file to read.
         """
+        for line in self._markdown_lines(filename):
+            self.process_markdown_line(line)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _markdown_lines(filename: str) -> Tuple[str, ...]:
+        """Reads and caches the lines of a markdown file."""
         with open(filename) as file:
-            for line in file.readlines():
-                self.process_markdown_line(line)
+            return tuple(file.read().splitlines())
 
 
 class HintArrow(ABC):
@@ -723,7 +861,7 @@ class HintToArrow(HintArrow):
             x + HINT_ARROW_WIDTH + SHORT_TEXT_MARGIN,
             y + HINT_ARROW_HEIGHT * flip,
             anchor=ttkc.W,
-            font=(FONT, FONT_SMALL_SIZE),
+            font=FONT_SMALL,
         )
         super().__init__(sheet, text_handle, "to")
         self._result = result
@@ -857,7 +995,7 @@ class HintFromArrow(HintArrow):
             x - HINT_ARROW_WIDTH - 2 * SHORT_TEXT_MARGIN,
             y,
             anchor=ttkc.E,
-            font=(FONT, FONT_SMALL_SIZE),
+            font=FONT_SMALL,
         )
 
     def set_branch(self, branch: RaceBranch | None) -> None:
@@ -932,7 +1070,7 @@ class HintFromAboveArrow(HintFromArrow):
             text_x,
             text_y,
             anchor=ttkc.W,
-            font=(FONT, FONT_SMALL_SIZE),
+            font=FONT_SMALL,
         )
 
 
@@ -1016,14 +1154,17 @@ class RaceDrawing:
                 raise NotImplementedError("The requested direction is not set.")
 
         if race_branch is not None:
-            # Draw the seed.
+            # Draw the seed. The label is purely decorative, so it is created
+            # disabled - Tk then skips it during event pick processing. The
+            # seed is formatted here rather than leaving Tk to convert the int.
             if self._show_seed:
                 self._sheet.canvas.create_text(
                     x + SHORT_TEXT_MARGIN,
                     y,
                     anchor=ttkc.W,
-                    text=race_branch.seed,
+                    text=str(race_branch.seed),
                     fill="red",
+                    state=ttkc.DISABLED,
                 )
 
         return number_box, from_arrow
@@ -1055,12 +1196,8 @@ class RaceDrawing:
         Returns:
             float: The x coordinate of the right side of the race.
         """
-        bracket_x_start = x + LABEL_WIDTH + TEXT_MARGIN
-        bracket_x_end = (
-            bracket_x_start
-            + 2 * HORIZONTAL_LINE_LENGTH
-            + (columns_wide - 1) * COLUMN_WIDTH
-        )
+        bracket_x_start = x + BRACKET_START_OFFSET
+        bracket_x_end = x + bracket_end_offset(columns_wide)
 
         def draw_race_number(
             anchor: Literal["nw", "n", "ne", "w", "center", "e", "sw", "s", "se"],
@@ -1230,7 +1367,7 @@ class AuxilliaryRaceSheet:
         self._box = NotesBox(
             canvas=sheet.canvas, top_left=top_left, bottom_right=bottom_right
         )
-        self._box.add_text("Auxilliary races", (FONT, FONT_TITLE_SIZE))
+        self._box.add_text("Auxilliary races", FONT_TITLE)
         self._box.add_text(
             "Auxilliary races are only used if there is a DNR in a primary knockout race with two competitors."
         )
@@ -1307,15 +1444,17 @@ class ArrowBetweenRounds:
         for pair in path:
             path_unstacked.extend(pair)
 
-        line = self._sheet.canvas.create_line(
+        # Tagged so the sheet can lower every order arrow in one pass once
+        # the tree has been drawn.
+        self._sheet.canvas.create_line(
             path_unstacked,
             arrow="last",
             smooth=False,
             width=EVENT_ORDER_ARROW_THICKNESS,
             fill=EVENT_ORDER_ARROW_COLOUR,
             arrowshape=(24, 30, 9),
+            tags=("orderarrow",),
         )
-        self._sheet.canvas.tag_lower(line)
 
 
 class EventStartArrow(ArrowBetweenRounds):
@@ -1332,7 +1471,7 @@ class EventStartArrow(ArrowBetweenRounds):
             from_coords[1],
             text="Event start",
             anchor=ttkc.E,
-            font=(FONT, FONT_NORMAL_SIZE),
+            font=FONT_NORMAL,
             fill=EVENT_ORDER_ARROW_COLOUR,
         )
         text_x1, text_y1, text_x2, text_y2 = self._sheet.canvas.bbox(text_handle)